@@ -1,153 +1,238 @@
 import streamlit as st
-import gspread
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
-from google.oauth2.service_account import Credentials
+import difflib
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+import hmac
+import numpy as np
 import pandas as pd
 from geopy.geocoders import Nominatim
-import time
+from geopy.extra.rate_limiter import RateLimiter
 import pydeck as pdk
 import re
 import requests
+import sqlite3
+import threading
 from bs4 import BeautifulSoup
+import soupsieve as sv
+
+from sheets_io import (
+    sheet_specs, events_numeric_cols, events_category_cols,
+    get_gspread_client, get_spreadsheet, ensure_sheets,
+    load_data, load_all_sheets, save_data, format_number_cell,
+)
+
+# --- Static Guide Text ---
+tier_guide_md = """
+- **1티어**: 광안리, 센텀
+- **2티어**: 부산역, 서면, 해운대
+- **3티어**: 남포동+자갈치, 미포, 청사포, 송정
+- **4티어**: 송도, 기장 (부산 가깝거나, 역 근처 or 센텀가는 버스가 많은 곳)
+- **5티어**: 다대포, 영도(태종대), 금련산(범어사), 기장 (부산 멀고 접근성 떨어지는 곳)
+
+*5티어로 갈수록 영화제와 함께 즐기려면 시간과 체력을 더 많이 써야 합니다.*
+"""
+food_guide_md = "부산 지역 명물 맛집, 시장 로컬 맛집, 명소/구경거리 등을 아래 '하고 싶은 것들'에 후보로 추가하여 계획해보세요."
+
+# '종류' → 지출 카테고리 매핑 — 렌더링마다 다시 만들 필요가 없는 고정 테이블
+food_cats = frozenset(['돼지', '스시/회', '디저트', '소', '카페', '복어', '와인바', '샐러드/포케', '이자카야'])
+spending_cat_map = {k: '식음료' for k in food_cats}
+spending_cat_map.update({'이동수단': '교통', '문화예술': '문화/예술', '숙소': '숙소'})
 
 # --- Password Protection ---
 def check_password():
     """Returns `True` if the user had the correct password."""
     def password_entered():
         """Checks whether a password entered by the user is correct."""
-        if st.session_state["password"] == st.secrets["APP_PASSWORD"]:
+        # Constant-time compare so the check doesn't leak timing information
+        if hmac.compare_digest(str(st.session_state["password"]), str(st.secrets["APP_PASSWORD"])):
             st.session_state["password_correct"] = True
             del st.session_state["password"]
         else:
             st.session_state["password_correct"] = False
 
-    if "password_correct" not in st.session_state:
-        st.text_input("Password", type="password", on_change=password_entered, key="password")
-        return False
-    elif not st.session_state["password_correct"]:
-        st.text_input("Password", type="password", on_change=password_entered, key="password")
-        st.error("😕 Password incorrect")
-        return False
-    else:
+    if st.session_state.get("password_correct", False):
         return True
+    st.text_input("Password", type="password", on_change=password_entered, key="password")
+    if "password_correct" in st.session_state:
+        st.error("😕 Password incorrect")
+    return False
 
-# --- Google Sheets Connection & Data Handling ---
-@st.cache_resource
-def get_gspread_client():
-    creds_dict = st.secrets["google_credentials"]["gcp"]
-    scopes = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-    creds = Credentials.from_service_account_info(creds_dict, scopes=scopes)
-    client = gspread.authorize(creds)
-    return client
+@st.cache_data(show_spinner=False, max_entries=4)
+def preprocess_2024(df):
+    """Filters the 2024 sheet and parses cost/date columns, cached by df hash."""
+    # "Day"는 리터럴이므로 regex=False로 정규식 컴파일/스캔을 피함
+    mask = df['상호'].notna() & df['상호'].str.len().gt(0) & ~df['상호'].str.contains("Day", regex=False, na=False)
+    data = df.loc[mask].copy()
+    for col in ['지원비용', '추가비용']:
+        data[col] = pd.to_numeric(data[col], errors='coerce').fillna(0)
+    data['총비용'] = data['지원비용'] + data['추가비용']
+    # cache=True: 반복되는 날짜/시각 문자열은 내부 캐시로 한 번만 파싱됨
+    data['방문일자'] = pd.to_datetime(data['방문일자'], errors='coerce', cache=True)
+    data['방문시간_dt'] = pd.to_datetime(data['방문시간'], format='%H:%M', errors='coerce', cache=True)
+    return data
 
-@st.cache_resource
-def get_spreadsheet(_client):
-    spreadsheet_key = st.secrets["google_credentials"]["spreadsheet_key"]
-    spreadsheet = _client.open_by_key(spreadsheet_key)
-    return spreadsheet
 
-def create_sheet_if_not_exists(spreadsheet, sheet_name, headers):
-    try:
-        worksheet = spreadsheet.worksheet(sheet_name)
-    except gspread.WorksheetNotFound:
-        worksheet = spreadsheet.add_worksheet(title=sheet_name, rows="100", cols=len(headers) if headers else 20)
-        if headers:
-            worksheet.append_row(headers)
-    return worksheet
 
-@st.cache_data(ttl=600) # Cache data for 10 minutes
-def load_data(_spreadsheet, sheet_name):
-    worksheet = _spreadsheet.worksheet(sheet_name)
-    return get_as_dataframe(worksheet, usecols=None, header=0, dtype=str).fillna("")
+# --- Geocoding Function ---
+# 지오코더는 프로세스당 하나만 만들어 커넥션을 재사용하고,
+# RateLimiter가 Nominatim 정책(1 req/s)에 맞춰 전역 속도를 조절함
+@st.cache_resource
+def get_geolocator():
+    geolocator = Nominatim(user_agent="biff_planner_app", timeout=10)
+    return RateLimiter(geolocator.geocode, min_delay_seconds=1, max_retries=2)
 
-def save_data(worksheet, df):
-    worksheet.clear()
-    set_with_dataframe(worksheet, df, include_index=False, resize=True)
-    # Clear all data caches to force a reload from the updated sheet
-    st.cache_data.clear()
+# RateLimiter 자체는 스레드 안전하지 않으므로, 워커들이 이 락으로
+# HTTP 게이트를 직렬화해야 전역 1 req/s가 실제로 지켜짐
+_nominatim_gate = threading.Lock()
 
+# 세션/배포를 넘어 살아남는 질의 → 좌표 L2 캐시.
+# BIFF 장소는 해마다 반복되므로 한 번 데워지면 HTTP 호출이 거의 사라짐.
+geocode_cache_path = "geocode_cache.sqlite"
+_geocode_db_lock = threading.Lock()
 
+@st.cache_resource
+def get_geocode_db():
+    conn = sqlite3.connect(geocode_cache_path, check_same_thread=False)
+    conn.execute("CREATE TABLE IF NOT EXISTS geocode_cache (query TEXT PRIMARY KEY, lat REAL, lon REAL)")
+    conn.commit()
+    return conn
 
-# --- Geocoding Function ---
-@st.cache_data
+@st.cache_resource
+def get_geocode_cache():
+    """시작 시 SQLite 캐시 전체를 dict로 올려 조회를 인메모리로 만듦."""
+    conn = get_geocode_db()
+    with _geocode_db_lock:
+        rows = conn.execute("SELECT query, lat, lon FROM geocode_cache").fetchall()
+    return {query: (lat, lon) for query, lat, lon in rows}
+
+def geocode_query(query):
+    """질의 하나를 인메모리 캐시 → Nominatim 순으로 좌표로 해석."""
+    cache = get_geocode_cache()
+    coords = cache.get(query)
+    if coords:
+        return coords
+    # 띄어쓰기/철자가 살짝 다른 과거 성공 질의가 있으면 HTTP 없이 재사용
+    # (캐시는 수백 건 규모라 difflib 비교가 API 호출보다 수십 배 쌈)
+    close = difflib.get_close_matches(query, cache.keys(), n=1, cutoff=0.85)
+    if close:
+        return cache[close[0]]
+    with _nominatim_gate:
+        location = get_geolocator()(query)
+    if location:
+        coords = (location.latitude, location.longitude)
+        conn = get_geocode_db()
+        with _geocode_db_lock, conn:
+            conn.execute("INSERT OR REPLACE INTO geocode_cache VALUES (?, ?, ?)", (query, *coords))
+            cache[query] = coords
+        return coords
+    return None
+
+def clean_query(text):
+    """주소/상호 문자열을 '부산 ...' 형태의 정규화된 캐시 키 겸 질의로 변환."""
+    if text is None or pd.isna(text) or not str(text).strip():
+        return ""
+    # 괄호 뒤를 버리고 공백을 접어 같은 장소가 항상 같은 키가 되게 함
+    return re.sub(r'\s+', ' ', f"부산 {str(text).split('(')[0].strip()}")
+
+@st.cache_data(persist="disk", show_spinner=False, max_entries=1024)
 def geocode_address(address, name):
     """
     Geocodes an address string to latitude and longitude.
     Falls back to name if address geocoding fails.
     """
-    # 1st try: Address
-    if address and not pd.isna(address) and str(address).strip():
+    # 주소 → 상호 순의 후보 질의를 한 루프로 시도 (분기 중복 제거)
+    for query in filter(None, (clean_query(address), clean_query(name))):
         try:
-            clean_address = address.split('(')[0].strip()
-            query = f"부산 {clean_address}"
-            geolocator = Nominatim(user_agent="biff_planner_app")
-            location = geolocator.geocode(query, timeout=10)
-            time.sleep(1)
-            if location:
-                return location.latitude, location.longitude
+            coords = geocode_query(query)
+            if coords:
+                return coords
         except Exception:
-            pass # Fallback to name
-
-    # 2nd try: Name
-    if name and not pd.isna(name) and str(name).strip():
-        try:
-            clean_name = name.split('(')[0].strip()
-            query = f"부산 {clean_name}"
-            geolocator = Nominatim(user_agent="biff_planner_app")
-            location = geolocator.geocode(query, timeout=10)
-            time.sleep(1)
-            if location:
-                return location.latitude, location.longitude
-        except Exception:
-            return None, None
-            
+            continue  # 다음 후보로 폴백
     return None, None
 
+def geocode_places(df):
+    """Geocodes each row's (주소, 상호) concurrently; returns [(lat, lon), ...] in row order."""
+    addresses = df['주소'] if '주소' in df.columns else pd.Series('', index=df.index)
+    pairs = [('' if pd.isna(a) else str(a), '' if pd.isna(n) else str(n))
+             for a, n in zip(addresses, df['상호'])]
+    # 같은 장소를 두 번 방문한 행은 질의도 같으므로 유니크 쌍만 지오코딩
+    unique_pairs = list(dict.fromkeys(pairs))
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = dict(zip(unique_pairs, executor.map(lambda pair: geocode_address(*pair), unique_pairs)))
+    return [results[pair] for pair in pairs]
+
 
 # --- BIFF Movie Crawling Function ---
-@st.cache_data
+# 세션 하나를 재사용해 biff.kr로의 TCP/TLS 연결을 유지함 —
+# 멀티 URL 크롤에서 요청마다 핸드셰이크를 다시 하지 않음
+_http_session = requests.Session()
+_http_session.headers.update({'User-Agent': 'Mozilla/5.0'})
+
+# select()는 호출마다 soupsieve로 선택자 문자열을 파싱하므로,
+# 반복 사용하는 선택자는 모듈에서 한 번만 컴파일해 둠
+_sel_title = sv.compile(".film_info_title .tit_h1")
+_sel_title_en = sv.compile(".film_info_title .film_tit_en")
+_sel_director = sv.compile(".film_director .dir_name")
+_sel_note = sv.compile(".film_synopsis .desc")
+_sel_specs = sv.compile(".film_info.film_tit ul > li")
+_sel_keywords = sv.compile(".film_tit .keywords")
+_sel_schedules = sv.compile(".pgv_schedule .pgv_sch_list")
+_sel_sch_code = sv.compile(".code")
+_sel_sch_date = sv.compile(".date")
+_sel_sch_time = sv.compile(".time")
+_sel_sch_theater = sv.compile(".theater")
+_sel_sch_grade = sv.compile(".sch_grade > span")
+# 예매코드에서 숫자만 남기는 패턴 — 한글 라벨도 지워야 하므로
+# ASCII 한정인 str.translate 테이블 대신 컴파일된 정규식을 씀
+_nondigit_re = re.compile(r'\D+')
+
+@st.cache_data(show_spinner=False, max_entries=256)
 def fetch_movie_info(url):
     # ... (crawl_biff.py의 함수를 그대로 가져옴)
     try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers)
-        response.encoding = 'utf-8'
+        response = _http_session.get(url)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+        # lxml이 html.parser보다 몇 배 빠르고, 바이트를 직접 넘기면
+        # 문서에 선언된 인코딩으로 파서가 알아서 디코딩함
+        soup = BeautifulSoup(response.content, 'lxml')
 
-        title_tag = soup.select_one(".film_info_title .tit_h1")
+        title_tag = _sel_title.select_one(soup)
         if title_tag and title_tag.find('small'):
             title_tag.find('small').decompose()
         title_kor = title_tag.text.strip() if title_tag else ""
 
+        # 같은 요소를 진리값 확인용/텍스트용으로 두 번 찾지 않도록 한 번만 조회
+        title_en_tag = _sel_title_en.select_one(soup)
+        director_tag = _sel_director.select_one(soup)
+        note_tag = _sel_note.select_one(soup)
         base_info = {
             "한국어 제목": title_kor,
-            "영어 제목": soup.select_one(".film_info_title .film_tit_en").text.strip() if soup.select_one(".film_info_title .film_tit_en") else "",
-            "감독": soup.select_one(".film_director .dir_name").text.strip() if soup.select_one(".film_director .dir_name") else "",
-            "Program Note": soup.select_one(".film_synopsis .desc").text.strip() if soup.select_one(".film_synopsis .desc") else ""
+            "영어 제목": title_en_tag.text.strip() if title_en_tag else "",
+            "감독": director_tag.text.strip() if director_tag else "",
+            "Program Note": note_tag.text.strip() if note_tag else ""
         }
         
-        spec_list = soup.select(".film_info.film_tit ul > li")
+        spec_list = _sel_specs.select(soup)
         base_info["국가"] = spec_list[0].text.replace("국가", "").strip() if len(spec_list) > 0 else ""
         base_info["제작 연도"] = spec_list[1].text.replace("제작연도", "").strip() if len(spec_list) > 1 else ""
         base_info["러닝타임"] = spec_list[2].text.replace("러닝타임", "").strip() if len(spec_list) > 2 else ""
         base_info["상영포맷"] = spec_list[3].text.replace("상영포맷", "").strip() if len(spec_list) > 3 else ""
         base_info["컬러"] = spec_list[4].text.replace("컬러", "").strip() if len(spec_list) > 4 else ""
         
-        hashtags = [tag.text.strip() for tag in soup.select(".film_tit .keywords")]
+        hashtags = [tag.text.strip() for tag in _sel_keywords.select(soup)]
         for i in range(3):
             base_info[f"해시태그{i+1}"] = hashtags[i] if i < len(hashtags) else ""
 
         final_data_list = []
-        schedule_tags = soup.select(".pgv_schedule .pgv_sch_list")
+        schedule_tags = _sel_schedules.select(soup)
         for schedule in schedule_tags:
             schedule_info = base_info.copy()
             schedule_info.update({
-                "예매코드": re.sub(r'\D', '', schedule.select_one(".code").text),
-                "날짜": schedule.select_one(".date").text.replace("날짜", "").strip(),
-                "시간": schedule.select_one(".time").text.replace("시간", "").strip(),
-                "상영관": schedule.select_one(".theater").text.replace("상영관", "").strip(),
-                "기타": " ".join([tag.text.strip() for tag in schedule.select(".sch_grade > span") if tag.text.strip()]),
+                "예매코드": _nondigit_re.sub('', _sel_sch_code.select_one(schedule).text),
+                "날짜": _sel_sch_date.select_one(schedule).text.replace("날짜", "").strip(),
+                "시간": _sel_sch_time.select_one(schedule).text.replace("시간", "").strip(),
+                "상영관": _sel_sch_theater.select_one(schedule).text.replace("상영관", "").strip(),
+                "기타": " ".join([tag.text.strip() for tag in _sel_sch_grade.select(schedule) if tag.text.strip()]),
                 "영화페이지": url
             })
             final_data_list.append(schedule_info)
@@ -156,6 +241,360 @@ def fetch_movie_info(url):
     except Exception:
         return None
 
+# cache_resource: Deck 객체를 그대로 돌려줘 재실행마다 피클 직렬화/복사를
+# 건너뜀 (렌더링은 읽기만 하므로 공유해도 안전). 날짜별로 최대 16개 유지.
+@st.cache_resource(max_entries=16, show_spinner=False)
+def build_deck(map_data_json, selected_date_str):
+    """일자별 이동 경로 Deck을 구성. 데이터가 같은 재실행에서는 캐시 히트."""
+    map_data = pd.read_json(StringIO(map_data_json), orient='split')
+    # 컬럼을 numpy 배열로 한 번만 뽑아 행별 .loc 조회를 없앰
+    lons = map_data['lon'].to_numpy()
+    lats = map_data['lat'].to_numpy()
+    names = map_data['상호'].to_numpy()
+
+    # 1. 경로 선 레이어 (시간에 따른 색상 변화)
+    if len(map_data) > 1:
+        alphas = 255 - np.arange(len(map_data) - 1) * (200 / len(map_data)) # 점점 옅어지는 붉은색
+        path_data = [
+            {
+                "start": [lons[i], lats[i]],
+                "end": [lons[i + 1], lats[i + 1]],
+                "color": [255, 0, 0, alphas[i]],
+                "tooltip": f"{i+1}. {names[i]} -> {i+2}. {names[i+1]}"
+            }
+            for i in range(len(map_data) - 1)
+        ]
+    else:
+        path_data = []
+
+
+    path_layer = pdk.Layer(
+        "LineLayer",
+        data=path_data,
+        get_source_position="start",
+        get_target_position="end",
+        get_color="color",
+        get_width=5,
+        highlight_color=[255, 255, 0],
+        picking_radius=10,
+        auto_highlight=True,
+    )
+
+    # 2. 비용 기반 원 레이어
+    scatter_layer = pdk.Layer(
+        "ScatterplotLayer",
+        data=map_data,
+        get_position=["lon", "lat"],
+        get_radius="총비용 * 0.2 + 50", # 비용에 따라 원 크기 조절
+        get_fill_color=[30, 144, 255, 180], # 파란색 원
+        pickable=True,
+    )
+
+    # 3. 순서 아이콘 레이어
+    icon_cols = zip(lons, lats, names, map_data['종류'].to_numpy(), map_data['총비용'].to_numpy())
+    icon_data = [
+        {
+            "coordinates": [lon, lat],
+            "text": str(i + 1),
+            "tooltip": f"**{i+1}. {name}**\n- 종류: {kind}\n- 총비용: {int(cost):,}원"
+        }
+        for i, (lon, lat, name, kind, cost) in enumerate(icon_cols)
+    ]
+
+    icon_layer = pdk.Layer(
+        "TextLayer",
+        data=icon_data,
+        get_position="coordinates",
+        get_text="text",
+        get_size=20,
+        get_color=[255, 255, 255],
+        get_angle=0,
+        get_text_anchor="'middle'",
+        get_alignment_baseline="'center'",
+    )
+
+    # 지도 초기 시점 설정 — 좌표 두 컬럼을 한 번에 평균
+    center = np.column_stack([lats, lons]).mean(axis=0)
+    view_state = pdk.ViewState(
+        latitude=center[0],
+        longitude=center[1],
+        zoom=12,
+        pitch=45,
+    )
+
+    # 덱 렌더링
+    r = pdk.Deck(
+        layers=[scatter_layer, path_layer, icon_layer],
+        initial_view_state=view_state,
+        # Carto 라이트 베이스맵 — Mapbox 토큰/style.json 왕복 없이 바로 렌더됨
+        map_style="light",
+        tooltip={"html": "{tooltip}", "style": {"color": "white"}},
+    )
+    return r
+
+# --- Trip Overview Tab ---
+@st.fragment
+def render_overview(df_overview, ws_overview):
+    st.header("📌 여행 개요")
+    if 'key' in df_overview.columns and 'value' in df_overview.columns:
+        overview_data = dict(zip(df_overview['key'], df_overview['value']))
+    else:
+        overview_data = {}
+    title = st.text_input("여행 제목", value=overview_data.get("title", "제30회 부산국제영화제(BIFF) 커플 여행"))
+    purpose = st.text_input("여행 목적", value=overview_data.get("purpose", "BIFF 영화 관람, 부산 관광 및 커플 여행"))
+    col1, col2 = st.columns(2)
+    with col1:
+        start_date = st.text_input("여행 시작일", value=overview_data.get("start_date", "2025-09-18"), disabled=True)
+    with col2:
+        end_date = st.text_input("여행 종료일", value=overview_data.get("end_date", "2025-09-23"), disabled=True)
+    if st.button("💾 여행 개요 저장하기", key="save_overview"):
+        new_overview_data = {"title": title, "purpose": purpose, "start_date": start_date, "end_date": end_date}
+        # 컬럼 단위로 바로 구성 — 튜플 리스트를 거쳐 재파싱하지 않음
+        df_overview_new = pd.DataFrame({'key': list(new_overview_data), 'value': list(new_overview_data.values())})
+        save_data(ws_overview, df_overview_new, orig=df_overview)
+        st.toast("✅ 여행 개요가 저장되었습니다!")
+
+# --- Planning Buffer Tab ---
+@st.fragment
+def render_planning(df_acc, ws_acc, df_act, ws_act):
+    st.header("📝 계획 버퍼 (아이디어)")
+    with st.expander("💡 여행 가이드라인 보기", expanded=True):
+        st.subheader("📍 부산 지역별 중요도 (Tier List)")
+        st.markdown(tier_guide_md)
+        st.subheader("🍽️ 맛집/명소 탐방 가이드")
+        st.markdown(food_guide_md)
+    st.divider()
+    st.subheader("🏨 숙소 예비 후보")
+    df_acc_new = st.data_editor(df_acc, num_rows="dynamic", use_container_width=True, key="acc_editor")
+    if st.button("💾 숙소 후보 저장하기", key="save_acc"):
+        save_data(ws_acc, df_acc_new, orig=df_acc)
+        st.toast("✅ 숙소 예비 후보 목록이 저장되었습니다!")
+    st.divider()
+    st.subheader("📋 하고 싶은 것들 (엑티비티)")
+    df_act_new = st.data_editor(df_act, num_rows="dynamic", use_container_width=True, key="act_editor")
+    if st.button("💾 하고 싶은 것들 저장하기", key="save_act"):
+        save_data(ws_act, df_act_new, orig=df_act)
+        st.toast("✅ 하고 싶은 것들 목록이 저장되었습니다!")
+
+# --- Movie List Tab ---
+@st.fragment
+def render_movies(df_movies, ws_movies):
+    st.header("🎬 관람 희망 영화 리스트")
+    st.info("BIFF 영화 정보 페이지 URL을 입력하고 '정보 가져오기' 버튼을 누르면, 아래 표에 상영 정보가 자동으로 추가됩니다.")
+
+    urls_text = st.text_area("영화 정보 페이지 URL을 한 줄에 하나씩 붙여넣으세요:", key="movie_urls")
+    if st.button("정보 가져오기", key="fetch_movie"):
+        urls = [u.strip() for u in urls_text.splitlines() if u.strip()]
+        if urls:
+            with st.spinner(f"{len(urls)}개 페이지에서 영화 정보를 크롤링하는 중..."):
+                # I/O 바운드이므로 스레드로 동시 요청 (캐시된 URL은 즉시 반환됨)
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    results = list(executor.map(fetch_movie_info, urls))
+            new_movie_data = [row for result in results if result for row in result]
+            if new_movie_data:
+                # 기존 데이터와 합치기 전에 세션 상태에 저장 (DataFrame 그대로 보관)
+                st.session_state.new_movies_to_add = pd.DataFrame(new_movie_data)
+                st.success(f"{len(new_movie_data)}개의 상영 일정을 찾았습니다! 아래 표에 임시로 추가되었습니다. 최종 저장을 위해 '영화 목록 저장하기' 버튼을 눌러주세요.")
+            else:
+                st.error("정보를 가져오는 데 실패했습니다. URL을 확인하거나 사이트 구조가 변경되었을 수 있습니다.")
+        else:
+            st.warning("URL을 입력해주세요.")
+
+    # 세션 상태에 추가할 영화 데이터가 있으면, 현재 표에 합쳐서 보여줌
+    if 'new_movies_to_add' in st.session_state:
+        display_df = pd.concat([df_movies, st.session_state.new_movies_to_add], ignore_index=True).fillna('')
+    else:
+        display_df = df_movies
+
+    st.divider()
+    st.subheader("전체 영화 목록")
+    df_movies_new = st.data_editor(display_df, num_rows="dynamic", use_container_width=True, key="movies_editor")
+
+    if st.button("💾 영화 목록 저장하기", key="save_movies"):
+        save_data(ws_movies, df_movies_new, orig=df_movies)
+        # 저장 후 세션 상태 초기화
+        if 'new_movies_to_add' in st.session_state:
+            del st.session_state.new_movies_to_add
+        st.toast("✅ 영화 목록이 Google Sheets에 저장되었습니다!")
+
+# --- Events Tab ---
+@st.fragment
+def render_events(df_events, ws_events):
+    st.header("✨ 체험단 정보")
+    # 숫자 컬럼은 float32로 보내 프런트엔드 전송량을 줄이고 정렬이 맞게 함
+    df_events_display = df_events.copy()
+    events_column_config = {"웹페이지": st.column_config.LinkColumn("웹페이지")}
+    for col in events_numeric_cols:
+        if col in df_events_display.columns:
+            df_events_display[col] = pd.to_numeric(df_events_display[col], errors='coerce').astype('Float32')
+            events_column_config[col] = st.column_config.NumberColumn(col)
+    for col in events_category_cols:
+        if col in df_events_display.columns:
+            # category는 data_editor에서 자동으로 셀렉트박스로 렌더링됨
+            df_events_display[col] = df_events_display[col].astype('category')
+    # 36컬럼 표 전체를 브라우저로 보내지 않도록 50행씩 나눠서 렌더링
+    page_size = 50
+    total_rows = len(df_events_display)
+    if total_rows > page_size:
+        # 페이지 번호로 나눠야 마지막 자투리 페이지(total % 50행)도 선택 가능함
+        num_pages = -(-total_rows // page_size)
+        page = st.number_input(f"페이지 (1-{num_pages})", 1, num_pages, 1, key="events_page")
+        start = (page - 1) * page_size
+    else:
+        start = 0
+    df_events_view = df_events_display.iloc[start:start + page_size]
+    df_events_new = st.data_editor(
+        df_events_view, num_rows="dynamic", use_container_width=True, key="events_editor",
+        column_config=events_column_config
+    )
+    if st.button("💾 체험단 정보 저장하기", key="save_events"):
+        # 편집기에 올라간 건 현재 페이지뿐 — 숫자 포맷 복원도 이 페이지의
+        # 셀에만 적용하고, 나머지 페이지는 원본 문자열을 그대로 이어 붙임
+        df_page_new = df_events_new.copy()
+        orig_page = df_events.iloc[start:start + page_size]
+        for col in events_numeric_cols:
+            if col in df_page_new.columns:
+                formatted = df_page_new[col].map(format_number_cell).to_numpy()
+                if len(df_page_new) == len(orig_page):
+                    # 값 비교는 문자열이 아니라 숫자로: 원본을 float32로
+                    # 왕복시켜 표시 캐스팅만 거친 셀이 변경으로 잡히지 않게 함.
+                    # 숫자로 못 읽는 원본("50,000원" 등)과 빈 셀은 양쪽 다
+                    # NaN이라 원본 문자열이 유지됨.
+                    orig_strings = orig_page[col].fillna('').astype(str).to_numpy()
+                    orig_num = pd.to_numeric(orig_strings, errors='coerce')
+                    edited_num = pd.to_numeric(df_page_new[col], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+                    unchanged = (edited_num == orig_num.astype(np.float32)) | (np.isnan(edited_num) & np.isnan(orig_num))
+                    df_page_new[col] = np.where(unchanged, orig_strings, formatted)
+                else:
+                    # 페이지 안에서 행이 추가/삭제된 경우 — 이 페이지는 전부
+                    # 사용자가 본 상태이므로 포맷 결과를 그대로 씀
+                    df_page_new[col] = formatted
+        df_events_save = pd.concat(
+            [df_events.iloc[:start], df_page_new, df_events.iloc[start + page_size:]],
+            ignore_index=True
+        )
+        save_data(ws_events, df_events_save, orig=df_events)
+        st.toast("✅ 체험단 정보가 저장되었습니다!")
+
+# --- 2024 Review Tab ---
+@st.fragment
+def render_2024_review(df_2024, ws_2024):
+    st.header("📊 2024년 여행 회고 및 분석")
+    if df_2024.empty or '상호' not in df_2024.columns:
+        st.warning("작년 여행 데이터가 'biff_2024' 시트에 없거나 형식이 맞지 않습니다.")
+
+    # --- 데이터 전처리 ---
+    data24 = preprocess_2024(df_2024)
+
+    # --- 1. 핵심 지표 (Key Metrics) ---
+    st.subheader("👑 한눈에 보는 작년 여행")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("총 지출액", f"{int(data24['총비용'].sum()):,} 원")
+    col2.metric("실제 지출액 (내돈내산)", f"{int(data24['추가비용'].sum()):,} 원")
+    col3.metric("체험단 지원 가치", f"{int(data24['지원비용'].sum()):,} 원")
+
+    # --- 2. 지출 분석 ---
+    st.subheader("💸 지출 분석")
+    # dict 기반 map은 행마다 파이썬 람다를 돌리지 않고 C 레벨에서 처리됨
+    data24['카테고리'] = data24['종류'].map(spending_cat_map).fillna('기타')
+    spending_by_cat = data24.groupby('카테고리')['총비용'].sum().sort_values(ascending=False)
+    st.bar_chart(spending_by_cat)
+
+    # --- 3. 동선 및 지역 분석 ---
+    st.subheader("🗺️ 동선 및 지역 분석")
+    map_data = data24.copy()
+    if 'lat' not in map_data.columns or 'lon' not in map_data.columns:
+        map_data['lat'], map_data['lon'] = None, None
+    
+    # 문자→숫자 변환은 컬럼당 한 번이면 충분 — 변환 결과를 바로 대입해
+    # 지오코딩 마스크와 지도 렌더링이 같은 float 컬럼을 쓰게 함
+    lat_num = pd.to_numeric(map_data['lat'], errors='coerce')
+    lon_num = pd.to_numeric(map_data['lon'], errors='coerce')
+    map_data['lat'], map_data['lon'] = lat_num, lon_num
+    rows_to_geocode = map_data[lat_num.isna() | lon_num.isna()]
+    if not rows_to_geocode.empty:
+        with st.spinner(f"{len(rows_to_geocode)}개 장소의 좌표 계산 중..."):
+            # 결과를 모아 한 번에 대입 (행마다 .loc 쓰기 방지); None은 NaN이 됨
+            coords = np.asarray(geocode_places(rows_to_geocode), dtype=float)
+            map_data.loc[rows_to_geocode.index, ['lat', 'lon']] = coords
+        # 새로 얻은 좌표는 시트에 한 번 써 두어 다음 세션에서 재계산하지 않음.
+        # 프래그먼트 재실행은 저장 전의 df_2024를 계속 들고 있으므로, 같은
+        # 배치를 클릭마다 다시 쓰지 않도록 세션에 배치 키를 남겨 1회만 저장
+        resolved = ~np.isnan(coords[:, 0])
+        batch_key = (len(df_2024), tuple(rows_to_geocode.index[resolved]))
+        if resolved.any() and st.session_state.get('latlon_saved_batch') != batch_key:
+            df_latlon = df_2024.copy()
+            for col in ('lat', 'lon'):
+                if col not in df_latlon.columns:
+                    df_latlon[col] = ''
+            df_latlon.loc[rows_to_geocode.index[resolved], ['lat', 'lon']] = coords[resolved]
+            save_data(ws_2024, df_latlon, orig=df_2024)
+            st.session_state['latlon_saved_batch'] = batch_key
+    
+    # 지도에는 좌표 두 컬럼만 넘겨 프런트엔드 전송량을 줄임
+    st.map(map_data[['lat', 'lon']].dropna(), zoom=11)
+
+    # --- 4. 시간 관리 분석 ---
+    st.subheader("⏰ 시간 관리 분석")
+    time_data = data24[['예약시간', '방문시간']].copy()
+    time_data = time_data[time_data['예약시간'].str.strip().ne('') & time_data['방문시간'].str.strip().ne('')]
+    if not time_data.empty:
+        # HH:MM 값은 대부분 반복되므로 cache=True로 고유값만 파싱됨
+        time_data['예약시간_dt'] = pd.to_datetime(time_data['예약시간'], format='%H:%M', errors='coerce', cache=True)
+        time_data['방문시간_dt'] = pd.to_datetime(time_data['방문시간'], format='%H:%M', errors='coerce', cache=True)
+        time_data.dropna(inplace=True)
+        time_data['차이(분)'] = (time_data['방문시간_dt'] - time_data['예약시간_dt']).dt.total_seconds() / 60
+        avg_diff = time_data['차이(분)'].mean()
+        st.metric("평균 도착 시간", f"{'예약보다 ' + str(int(abs(avg_diff))) + '분 일찍' if avg_diff < 0 else '예약보다 ' + str(int(avg_diff)) + '분 늦게'}")
+
+
+
+    # --- 일자별 분석용 정렬 (전처리는 위에서 이미 끝남) ---
+    data24 = data24.sort_values(by=['방문일자', '방문시간_dt']).dropna(subset=['방문일자'])
+
+    # --- 날짜 선택기 ---
+    # 한 번의 groupby로 날짜 목록과 일자별 행을 모두 얻음 (날짜별 재스캔 방지)
+    day_groups = data24.groupby(data24['방문일자'].dt.date, sort=True)
+    unique_dates = list(day_groups.groups)
+    selected_date_str = st.selectbox("분석할 날짜를 선택하세요:", [d.strftime('%Y-%m-%d') for d in unique_dates])
+    selected_date = pd.to_datetime(selected_date_str).date()
+
+    day_df = day_groups.get_group(selected_date).copy()
+    day_df.reset_index(drop=True, inplace=True)
+
+    # --- 좌표 계산 ---
+    if 'lat' not in day_df.columns or 'lon' not in day_df.columns:
+        day_df['lat'], day_df['lon'] = None, None
+    
+    lat_num = pd.to_numeric(day_df['lat'], errors='coerce')
+    lon_num = pd.to_numeric(day_df['lon'], errors='coerce')
+    day_df['lat'], day_df['lon'] = lat_num, lon_num
+    rows_to_geocode = day_df[lat_num.isna() | lon_num.isna()]
+    if not rows_to_geocode.empty:
+        with st.spinner(f"{len(rows_to_geocode)}개 장소의 좌표 계산 중..."):
+            coords = np.asarray(geocode_places(rows_to_geocode), dtype=float)
+            day_df.loc[rows_to_geocode.index, ['lat', 'lon']] = coords
+
+    map_data = day_df.dropna(subset=['lat', 'lon']).copy()
+    map_data.reset_index(drop=True, inplace=True)
+
+    if map_data.empty:
+        st.warning("선택한 날짜에 지도에 표시할 장소가 없습니다.")        
+
+        # --- Pydeck 시각화 ---
+    st.subheader(f"🗺️ {selected_date_str} 이동 경로")
+
+    # Deck 구성은 일자별 데이터가 같으면 캐시에서 재사용됨
+    deck = build_deck(map_data[['lat', 'lon', '상호', '종류', '총비용']].to_json(orient='split'), selected_date_str)
+    st.pydeck_chart(deck)
+
+    # --- 경로 정보 요약 ---
+    st.subheader("📝 경로 정보")
+    route_cols = zip(map_data['상호'].to_numpy(), map_data['방문시간'].to_numpy(), map_data['총비용'].to_numpy())
+    for i, (name, visit_time, cost) in enumerate(route_cols, start=1):
+        st.markdown(f"**{i}. {name}** ({visit_time}) - {int(cost):,}원")
+
+
 # --- Streamlit UI ---
 st.set_page_config(page_title="부산 커플 여행 플래너", layout="wide")
 
@@ -164,315 +603,74 @@ if not check_password():
 
 st.title("💘 30회 BIFF 4박 5일 커플 여행 플래너 (Google Sheets 연동)")
 
+# 캐시가 꼬였을 때 전체가 아닌 해당 캐시만 비울 수 있는 운영용 스위치
+with st.sidebar.expander("⚙️ 캐시 관리"):
+    st.caption("데이터가 이상할 때 필요한 캐시만 골라서 비우세요.")
+    if st.button("시트 데이터 새로고침", key="clear_sheet_cache"):
+        load_data.clear()
+        load_all_sheets.clear()
+        st.toast("시트 캐시를 비웠습니다.")
+    if st.button("지오코딩 캐시 비우기", key="clear_geocode_cache"):
+        # SQLite L2부터 비워야 함 — 남겨두면 다음 조회가 잘못된 좌표를
+        # 그대로 다시 메모리로 올려 버튼이 무의미해짐
+        conn = get_geocode_db()
+        with _geocode_db_lock, conn:
+            conn.execute("DELETE FROM geocode_cache")
+        geocode_address.clear()
+        get_geocode_cache.clear()
+        st.toast("지오코딩 캐시를 비웠습니다.")
+    if st.button("영화 크롤링 캐시 비우기", key="clear_crawl_cache"):
+        fetch_movie_info.clear()
+        st.toast("크롤링 캐시를 비웠습니다.")
+
 try:
     gspread_client = get_gspread_client()
     spreadsheet = get_spreadsheet(gspread_client)
 
-    # Define headers and get worksheets
-    overview_headers = ["key", "value"]
-    acc_headers = ["숙소명", "위치", "예상 비용", "장점", "예약링크", "상태"]
-    act_headers = ["활동명", "장소", "예상 비용", "소요시간", "메모"]
-    movies_headers = ["한국어 제목", "영어 제목", "감독", "국가", "제작 연도", "러닝타임", "상영포맷", "컬러", "해시태그1", "해시태그2", "해시태그3", "예매코드", "날짜", "시간", "상영관", "기타", "예매우선순위", "예매성공여부", "영화페이지", "영화참고자료", "Program Note"]
-    events_headers = [
-        "No.", "상호", "예약계획", "방문일자", "방문요일", "예약시간", "방문시간", "Schedule", "플랫폼", "종류", "술", "콜/프", 
-        "포스팅마감일자", "웹페이지", "지원내역", "예약가능일시", "방문전특이사항", "월", "화", "수", "목", "금", "토", "일", 
-        "주소", "위치설명", "권역", "세부권역", "주문메뉴", "지원비용", "추가비용", "방문후특이사항", "뿡이별점", "뿡이코멘트", "쁜찬별점", "쁜찬코멘트"
-    ]
-    
-    ws_overview = create_sheet_if_not_exists(spreadsheet, "overview", overview_headers)
-    ws_acc = create_sheet_if_not_exists(spreadsheet, "accommodation_candidates", acc_headers)
-    ws_act = create_sheet_if_not_exists(spreadsheet, "activity_candidates", act_headers)
-    ws_movies = create_sheet_if_not_exists(spreadsheet, "movies", movies_headers)
-    ws_events = create_sheet_if_not_exists(spreadsheet, "events", events_headers)
-    ws_2024 = create_sheet_if_not_exists(spreadsheet, "biff_2024", [])
+    # One worksheets() call for the existence checks, one values.batchGet
+    # for all six sheets — two round-trips total on a cold start
+    worksheets = ensure_sheets(spreadsheet, sheet_specs)
+    ws_overview = worksheets["overview"]
+    ws_acc = worksheets["accommodation_candidates"]
+    ws_act = worksheets["activity_candidates"]
+    ws_movies = worksheets["movies"]
+    ws_events = worksheets["events"]
+    ws_2024 = worksheets["biff_2024"]
 
     # Load data
-    df_overview = load_data(spreadsheet, "overview")
-    df_acc = load_data(spreadsheet, "accommodation_candidates")
-    df_act = load_data(spreadsheet, "activity_candidates")
-    df_movies = load_data(spreadsheet, "movies")
-    df_events = load_data(spreadsheet, "events")
-    df_2024 = load_data(spreadsheet, "biff_2024")
+    dataframes = load_all_sheets(tuple(name for name, _ in sheet_specs))
+    df_overview = dataframes["overview"]
+    df_acc = dataframes["accommodation_candidates"]
+    df_act = dataframes["activity_candidates"]
+    df_movies = dataframes["movies"]
+    df_events = dataframes["events"]
+    df_2024 = dataframes["biff_2024"]
+    # 큰 두 시트는 Arrow 문자열 컬럼으로 변환 — str.contains/split 같은
+    # 벡터 문자열 연산이 object 배열 대신 Arrow C++ 커널에서 실행됨
+    df_events = df_events.convert_dtypes(dtype_backend='pyarrow')
+    df_2024 = df_2024.convert_dtypes(dtype_backend='pyarrow')
 
     # --- UI Tabs ---
     tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["여행 개요", "📝 계획 버퍼", "🎬 영화 목록", "🗺️ 작년 여행 돌아보기", "🗓️ 상세 일정", "✨ 체험단"])
 
     with tab1:
-        st.header("📌 여행 개요")
-        if 'key' in df_overview.columns and 'value' in df_overview.columns:
-            overview_data = dict(zip(df_overview['key'], df_overview['value']))
-        else:
-            overview_data = {}
-        title = st.text_input("여행 제목", value=overview_data.get("title", "제30회 부산국제영화제(BIFF) 커플 여행"))
-        purpose = st.text_input("여행 목적", value=overview_data.get("purpose", "BIFF 영화 관람, 부산 관광 및 커플 여행"))
-        col1, col2 = st.columns(2)
-        with col1:
-            start_date = st.text_input("여행 시작일", value=overview_data.get("start_date", "2025-09-18"), disabled=True)
-        with col2:
-            end_date = st.text_input("여행 종료일", value=overview_data.get("end_date", "2025-09-23"), disabled=True)
-        if st.button("💾 여행 개요 저장하기", key="save_overview"):
-            new_overview_data = {"title": title, "purpose": purpose, "start_date": start_date, "end_date": end_date}
-            df_overview_new = pd.DataFrame(new_overview_data.items(), columns=['key', 'value'])
-            save_data(ws_overview, df_overview_new)
-            st.success("✅ 여행 개요가 저장되었습니다!")
-            st.rerun()
+        render_overview(df_overview, ws_overview)
 
     with tab2:
-        st.header("📝 계획 버퍼 (아이디어)")
-        with st.expander("💡 여행 가이드라인 보기", expanded=True):
-            st.subheader("📍 부산 지역별 중요도 (Tier List)")
-            st.markdown("""
-            - **1티어**: 광안리, 센텀
-            - **2티어**: 부산역, 서면, 해운대
-            - **3티어**: 남포동+자갈치, 미포, 청사포, 송정
-            - **4티어**: 송도, 기장 (부산 가깝거나, 역 근처 or 센텀가는 버스가 많은 곳)
-            - **5티어**: 다대포, 영도(태종대), 금련산(범어사), 기장 (부산 멀고 접근성 떨어지는 곳)
-            
-            *5티어로 갈수록 영화제와 함께 즐기려면 시간과 체력을 더 많이 써야 합니다.*
-            """)
-            st.subheader("🍽️ 맛집/명소 탐방 가이드")
-            st.markdown("부산 지역 명물 맛집, 시장 로컬 맛집, 명소/구경거리 등을 아래 '하고 싶은 것들'에 후보로 추가하여 계획해보세요.")
-        st.divider()
-        st.subheader("🏨 숙소 예비 후보")
-        df_acc_new = st.data_editor(df_acc, num_rows="dynamic", use_container_width=True, key="acc_editor")
-        if st.button("💾 숙소 후보 저장하기", key="save_acc"):
-            save_data(ws_acc, df_acc_new)
-            st.success("✅ 숙소 예비 후보 목록이 저장되었습니다!")
-            st.rerun()
-        st.divider()
-        st.subheader("📋 하고 싶은 것들 (엑티비티)")
-        df_act_new = st.data_editor(df_act, num_rows="dynamic", use_container_width=True, key="act_editor")
-        if st.button("💾 하고 싶은 것들 저장하기", key="save_act"):
-            save_data(ws_act, df_act_new)
-            st.success("✅ 하고 싶은 것들 목록이 저장되었습니다!")
-            st.rerun()
+        render_planning(df_acc, ws_acc, df_act, ws_act)
 
     with tab3:
-        st.header("🎬 관람 희망 영화 리스트")
-        st.info("BIFF 영화 정보 페이지 URL을 입력하고 '정보 가져오기' 버튼을 누르면, 아래 표에 상영 정보가 자동으로 추가됩니다.")
-        
-        url = st.text_input("영화 정보 페이지 URL을 붙여넣으세요:", key="movie_url")
-        if st.button("정보 가져오기", key="fetch_movie"):
-            if url:
-                with st.spinner("영화 정보를 크롤링하는 중..."):
-                    new_movie_data = fetch_movie_info(url)
-                if new_movie_data:
-                    new_df = pd.DataFrame(new_movie_data)
-                    # 기존 데이터와 합치기 전에 세션 상태에 저장
-                    st.session_state.new_movies_to_add = new_df.to_dict('records')
-                    st.success(f"{len(new_movie_data)}개의 상영 일정을 찾았습니다! 아래 표에 임시로 추가되었습니다. 최종 저장을 위해 '영화 목록 저장하기' 버튼을 눌러주세요.")
-                else:
-                    st.error("정보를 가져오는 데 실패했습니다. URL을 확인하거나 사이트 구조가 변경되었을 수 있습니다.")
-            else:
-                st.warning("URL을 입력해주세요.")
-        
-        # 세션 상태에 추가할 영화 데이터가 있으면, 현재 표에 합쳐서 보여줌
-        if 'new_movies_to_add' in st.session_state:
-            new_movies_df = pd.DataFrame(st.session_state.new_movies_to_add)
-            display_df = pd.concat([df_movies, new_movies_df], ignore_index=True).fillna('')
-        else:
-            display_df = df_movies
-
-        st.divider()
-        st.subheader("전체 영화 목록")
-        df_movies_new = st.data_editor(display_df, num_rows="dynamic", use_container_width=True, key="movies_editor")
-        
-        if st.button("💾 영화 목록 저장하기", key="save_movies"):
-            save_data(ws_movies, df_movies_new)
-            # 저장 후 세션 상태 초기화
-            if 'new_movies_to_add' in st.session_state:
-                del st.session_state.new_movies_to_add
-            st.success("✅ 영화 목록이 Google Sheets에 저장되었습니다!")
-            # 6. st.rerun() 대신, 현재 스크립트의 데이터 변수를 직접 업데이트합니다.
-            df_movies = df_movies_new
+        render_movies(df_movies, ws_movies)
 
     with tab4:
-        st.header("📊 2024년 여행 회고 및 분석")
-        if df_2024.empty or '상호' not in df_2024.columns:
-            st.warning("작년 여행 데이터가 'biff_2024' 시트에 없거나 형식이 맞지 않습니다.")
-
-        # --- 데이터 전처리 ---
-        data24 = df_2024[df_2024['상호'].notna() & (df_2024['상호'] != '') & (~df_2024['상호'].str.contains("Day", na=False))].copy()
-        for col in ['지원비용', '추가비용']:
-            data24[col] = pd.to_numeric(data24[col], errors='coerce').fillna(0)
-        data24['총비용'] = data24['지원비용'] + data24['추가비용']
-        
-        # --- 1. 핵심 지표 (Key Metrics) ---
-        st.subheader("👑 한눈에 보는 작년 여행")
-        col1, col2, col3 = st.columns(3)
-        col1.metric("총 지출액", f"{int(data24['총비용'].sum()):,} 원")
-        col2.metric("실제 지출액 (내돈내산)", f"{int(data24['추가비용'].sum()):,} 원")
-        col3.metric("체험단 지원 가치", f"{int(data24['지원비용'].sum()):,} 원")
-
-        # --- 2. 지출 분석 ---
-        st.subheader("💸 지출 분석")
-        food_cats = ['돼지', '스시/회', '디저트', '소', '카페', '복어', '와인바', '샐러드/포케', '이자카야']
-        data24['카테고리'] = data24['종류'].apply(lambda x: '식음료' if x in food_cats else ('교통' if x == '이동수단' else ('문화/예술' if x == '문화예술' else ('숙소' if x == '숙소' else '기타'))))
-        spending_by_cat = data24.groupby('카테고리')['총비용'].sum().sort_values(ascending=False)
-        st.bar_chart(spending_by_cat)
-
-        # --- 3. 동선 및 지역 분석 ---
-        st.subheader("🗺️ 동선 및 지역 분석")
-        map_data = data24.copy()
-        if 'lat' not in map_data.columns or 'lon' not in map_data.columns:
-            map_data['lat'], map_data['lon'] = None, None
-        
-        rows_to_geocode = map_data[pd.to_numeric(map_data['lat'], errors='coerce').isna()]
-        if not rows_to_geocode.empty:
-            with st.spinner(f"{len(rows_to_geocode)}개 장소의 좌표 계산 중..."):
-                for index, row in rows_to_geocode.iterrows():
-                    lat, lon = geocode_address(row.get('주소'), row.get('상호'))
-                    map_data.loc[index, 'lat'] = lat
-                    map_data.loc[index, 'lon'] = lon
-        
-        map_data['lat'] = pd.to_numeric(map_data['lat'], errors='coerce')
-        map_data['lon'] = pd.to_numeric(map_data['lon'], errors='coerce')
-        st.map(map_data.dropna(subset=['lat', 'lon']), zoom=11)
-
-        # --- 4. 시간 관리 분석 ---
-        st.subheader("⏰ 시간 관리 분석")
-        time_data = data24[['예약시간', '방문시간']].copy()
-        time_data = time_data[time_data['예약시간'].str.strip().ne('') & time_data['방문시간'].str.strip().ne('')]
-        if not time_data.empty:
-            time_data['예약시간_dt'] = pd.to_datetime(time_data['예약시간'], format='%H:%M', errors='coerce')
-            time_data['방문시간_dt'] = pd.to_datetime(time_data['방문시간'], format='%H:%M', errors='coerce')
-            time_data.dropna(inplace=True)
-            time_data['차이(분)'] = (time_data['방문시간_dt'] - time_data['예약시간_dt']).dt.total_seconds() / 60
-            avg_diff = time_data['차이(분)'].mean()
-            st.metric("평균 도착 시간", f"{'예약보다 ' + str(int(abs(avg_diff))) + '분 일찍' if avg_diff < 0 else '예약보다 ' + str(int(avg_diff)) + '분 늦게'}")
-
-
-
-        # --- 데이터 전처리 ---
-        data24 = df_2024[df_2024['상호'].notna() & (df_2024['상호'] != '') & (~df_2024['상호'].str.contains("Day", na=False))].copy()
-        for col in ['지원비용', '추가비용']:
-            data24[col] = pd.to_numeric(data24[col], errors='coerce').fillna(0)
-        data24['총비용'] = data24['지원비용'] + data24['추가비용']
-        data24['방문일자'] = pd.to_datetime(data24['방문일자'], errors='coerce')
-        data24['방문시간_dt'] = pd.to_datetime(data24['방문시간'], format='%H:%M', errors='coerce')
-        data24.sort_values(by=['방문일자', '방문시간_dt'], inplace=True)
-        data24.dropna(subset=['방문일자'], inplace=True)
-
-        # --- 날짜 선택기 ---
-        unique_dates = sorted(data24['방문일자'].dt.date.unique())
-        selected_date_str = st.selectbox("분석할 날짜를 선택하세요:", [d.strftime('%Y-%m-%d') for d in unique_dates])
-        selected_date = pd.to_datetime(selected_date_str).date()
-
-        day_df = data24[data24['방문일자'].dt.date == selected_date].copy()
-        day_df.reset_index(drop=True, inplace=True)
-
-        # --- 좌표 계산 ---
-        if 'lat' not in day_df.columns or 'lon' not in day_df.columns:
-            day_df['lat'], day_df['lon'] = None, None
-        
-        rows_to_geocode = day_df[pd.to_numeric(day_df['lat'], errors='coerce').isna()]
-        if not rows_to_geocode.empty:
-            with st.spinner(f"{len(rows_to_geocode)}개 장소의 좌표 계산 중..."):
-                for index, row in rows_to_geocode.iterrows():
-                    lat, lon = geocode_address(row.get('주소'), row.get('상호'))
-                    day_df.loc[index, 'lat'] = lat
-                    day_df.loc[index, 'lon'] = lon
-        
-        day_df['lat'] = pd.to_numeric(day_df['lat'], errors='coerce')
-        day_df['lon'] = pd.to_numeric(day_df['lon'], errors='coerce')
-        map_data = day_df.dropna(subset=['lat', 'lon']).copy()
-        map_data.reset_index(drop=True, inplace=True)
-
-        if map_data.empty:
-            st.warning("선택한 날짜에 지도에 표시할 장소가 없습니다.")        
-
-            # --- Pydeck 시각화 ---
-        st.subheader(f"🗺️ {selected_date_str} 이동 경로")
-
-        # 1. 경로 선 레이어 (시간에 따른 색상 변화)
-        path_data = []
-        for i in range(len(map_data) - 1):
-            path_data.append({
-                "start": [map_data.loc[i, 'lon'], map_data.loc[i, 'lat']],
-                "end": [map_data.loc[i + 1, 'lon'], map_data.loc[i + 1, 'lat']],
-                "color": [255, 0, 0, 255 - (i * (200 / len(map_data)))], # 점점 옅어지는 붉은색
-                "tooltip": f"{i+1}. {map_data.loc[i, '상호']} -> {i+2}. {map_data.loc[i+1, '상호']}"
-            })
-        
-        path_layer = pdk.Layer(
-            "LineLayer",
-            data=path_data,
-            get_source_position="start",
-            get_target_position="end",
-            get_color="color",
-            get_width=5,
-            highlight_color=[255, 255, 0],
-            picking_radius=10,
-            auto_highlight=True,
-        )
-
-        # 2. 비용 기반 원 레이어
-        scatter_layer = pdk.Layer(
-            "ScatterplotLayer",
-            data=map_data,
-            get_position=["lon", "lat"],
-            get_radius="총비용 * 0.2 + 50", # 비용에 따라 원 크기 조절
-            get_fill_color=[30, 144, 255, 180], # 파란색 원
-            pickable=True,
-        )
-
-        # 3. 순서 아이콘 레이어
-        icon_data = []
-        for i, row in map_data.iterrows():
-            icon_data.append({
-                "coordinates": [row['lon'], row['lat']],
-                "text": str(i + 1),
-                "tooltip": f"**{i+1}. {row['상호']}**\n- 종류: {row['종류']}\n- 총비용: {int(row['총비용']):,}원"
-            })
-
-        icon_layer = pdk.Layer(
-            "TextLayer",
-            data=icon_data,
-            get_position="coordinates",
-            get_text="text",
-            get_size=20,
-            get_color=[255, 255, 255],
-            get_angle=0,
-            get_text_anchor="'middle'",
-            get_alignment_baseline="'center'",
-        )
-
-        # 지도 초기 시점 설정
-        view_state = pdk.ViewState(
-            latitude=map_data["lat"].mean(),
-            longitude=map_data["lon"].mean(),
-            zoom=12,
-            pitch=45,
-        )
-
-        # 덱 렌더링
-        r = pdk.Deck(
-            layers=[scatter_layer, path_layer, icon_layer],
-            initial_view_state=view_state,
-            map_style="mapbox://styles/mapbox/light-v10",
-            tooltip={"html": "{tooltip}", "style": {"color": "white"}},
-        )
-        st.pydeck_chart(r)
-
-        # --- 경로 정보 요약 ---
-        st.subheader("📝 경로 정보")
-        for i, row in map_data.iterrows():
-            st.markdown(f"**{i+1}. {row['상호']}** ({row['방문시간']}) - {int(row['총비용']):,}원")
+        render_2024_review(df_2024, ws_2024)
 
     with tab5:
         st.header("🗓️ 상세 일정")
         st.info("상세 일정은 Google Sheets에서 직접 편집하는 것이 더 편리할 수 있습니다.")
 
     with tab6:
-        st.header("✨ 체험단 정보")
-        df_events_new = st.data_editor(
-            df_events, num_rows="dynamic", use_container_width=True, key="events_editor",
-            column_config={"웹페이지": st.column_config.LinkColumn("웹페이지")}
-        )
-        if st.button("💾 체험단 정보 저장하기", key="save_events"):
-            save_data(ws_events, df_events_new)
-            st.success("✅ 체험단 정보가 저장되었습니다!")
-            st.rerun()
+        render_events(df_events, ws_events)
 
 except Exception as e:
     st.error(f"앱 로딩 중 오류가 발생했습니다: {e}")
\ No newline at end of file
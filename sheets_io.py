@@ -0,0 +1,175 @@
+import streamlit as st
+import gspread
+from google.auth.transport.requests import AuthorizedSession
+from google.oauth2.service_account import Credentials
+import numpy as np
+import pandas as pd
+import requests
+
+# --- Sheet Schemas ---
+# Tuples so they aren't rebuilt per rerun and stay hashable for cache keys
+overview_headers = ("key", "value")
+acc_headers = ("숙소명", "위치", "예상 비용", "장점", "예약링크", "상태")
+act_headers = ("활동명", "장소", "예상 비용", "소요시간", "메모")
+movies_headers = ("한국어 제목", "영어 제목", "감독", "국가", "제작 연도", "러닝타임", "상영포맷", "컬러", "해시태그1", "해시태그2", "해시태그3", "예매코드", "날짜", "시간", "상영관", "기타", "예매우선순위", "예매성공여부", "영화페이지", "영화참고자료", "Program Note")
+events_headers = (
+    "No.", "상호", "예약계획", "방문일자", "방문요일", "예약시간", "방문시간", "Schedule", "플랫폼", "종류", "술", "콜/프",
+    "포스팅마감일자", "웹페이지", "지원내역", "예약가능일시", "방문전특이사항", "월", "화", "수", "목", "금", "토", "일",
+    "주소", "위치설명", "권역", "세부권역", "주문메뉴", "지원비용", "추가비용", "방문후특이사항", "뿡이별점", "뿡이코멘트", "쁜찬별점", "쁜찬코멘트"
+)
+events_numeric_cols = ("No.", "지원비용", "추가비용", "뿡이별점", "쁜찬별점")
+# 반복되는 짧은 문자열 컬럼 — category dtype으로 보내면 메모리/전송량이 크게 줄어듦
+events_category_cols = ("플랫폼", "종류", "술", "콜/프", "월", "화", "수", "목", "금", "토", "일", "권역", "세부권역")
+
+sheet_specs = (
+    ("overview", overview_headers),
+    ("accommodation_candidates", acc_headers),
+    ("activity_candidates", act_headers),
+    ("movies", movies_headers),
+    ("events", events_headers),
+    ("biff_2024", ()),
+)
+
+# --- Google Sheets Connection & Data Handling ---
+@st.cache_resource(ttl=3600)
+def get_gspread_client():
+    creds_dict = st.secrets["google_credentials"]["gcp"]
+    scopes = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+    creds = Credentials.from_service_account_info(creds_dict, scopes=scopes)
+    # Pooled keep-alive session: concurrent sheet loads reuse warm TLS
+    # connections instead of paying a handshake per REST call
+    session = AuthorizedSession(creds)
+    adapter = requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=10)
+    session.mount('https://', adapter)
+    client = gspread.Client(auth=creds, session=session)
+    return client
+
+@st.cache_resource(ttl=3600)
+def get_spreadsheet(_client):
+    spreadsheet_key = st.secrets["google_credentials"]["spreadsheet_key"]
+    spreadsheet = _client.open_by_key(spreadsheet_key)
+    return spreadsheet
+
+@st.cache_resource
+def ensure_sheets(_spreadsheet, specs):
+    """Creates any missing sheets and returns {name: worksheet}.
+
+    One worksheets() call covers the existence check for every sheet,
+    instead of a per-sheet round-trip.
+    """
+    existing = {ws.title: ws for ws in _spreadsheet.worksheets()}
+    worksheets = {}
+    header_writes = []
+    for sheet_name, headers in specs:
+        worksheet = existing.get(sheet_name)
+        if worksheet is None:
+            worksheet = _spreadsheet.add_worksheet(title=sheet_name, rows="100", cols=len(headers) if headers else 20)
+            if headers:
+                header_writes.append({"range": f"'{sheet_name}'!A1", "values": [list(headers)]})
+        worksheets[sheet_name] = worksheet
+    # 새로 만든 시트들의 헤더는 시트당 append_row 대신 한 번에 기록
+    if header_writes:
+        _spreadsheet.values_batch_update(body={"valueInputOption": "RAW", "data": header_writes})
+    return worksheets
+
+@st.cache_data(ttl=300, show_spinner=False, max_entries=16) # Cache data for 5 minutes
+def load_data(sheet_name):
+    # Keyed on the hashable sheet name; the worksheet handle itself comes
+    # from the cached client so reruns don't pay a Sheets round-trip.
+    spreadsheet = get_spreadsheet(get_gspread_client())
+    worksheet = spreadsheet.worksheet(sheet_name)
+    values = worksheet.get_all_values()
+    if not values:
+        return pd.DataFrame()
+    # Cells arrive as strings already, so no NaN cleanup pass is needed
+    return pd.DataFrame(values[1:], columns=values[0])
+
+@st.cache_data(ttl=300, show_spinner=False, max_entries=4)
+def load_all_sheets(sheet_names):
+    """Fetches every sheet in a single values.batchGet round-trip."""
+    spreadsheet = get_spreadsheet(get_gspread_client())
+    result = spreadsheet.values_batch_get(ranges=[f"'{name}'" for name in sheet_names])
+    dataframes = {}
+    for sheet_name, value_range in zip(sheet_names, result['valueRanges']):
+        values = value_range.get('values', [])
+        if not values:
+            dataframes[sheet_name] = pd.DataFrame()
+            continue
+        # batchGet omits trailing empty cells, so pad rows to the grid width
+        width = max(len(row) for row in values)
+        header = values[0] + [''] * (width - len(values[0]))
+        rows = [row + [''] * (width - len(row)) for row in values[1:]]
+        dataframes[sheet_name] = pd.DataFrame(rows, columns=header)
+    return dataframes
+
+def _as_cell_strings(df):
+    """Renders a frame as the all-string grid the sheet will hold.
+
+    Missing values (cleared editor cells, unresolved coords) become empty
+    cells — str() would write the literal "None"/"nan" into the sheet.
+    """
+    return df.astype(object).where(df.notna(), "").astype(str)
+
+def save_all(spreadsheet, pairs, prev_rows=None):
+    """Writes [(sheet_name, df), ...] back in batched API calls.
+
+    `prev_rows` maps sheet names to their previous row counts; sheets known
+    not to have shrunk skip the trailing clear, so the grow-or-same case
+    costs a single HTTP call.
+    """
+    prev_rows = prev_rows or {}
+    data = [
+        {"range": f"'{name}'!A1", "values": [df.columns.tolist()] + _as_cell_strings(df).values.tolist()}
+        for name, df in pairs
+    ]
+    spreadsheet.values_batch_update(body={"valueInputOption": "USER_ENTERED", "data": data})
+    # The write overlays the old contents, so only rows below the new data
+    # can hold leftovers — and only when the sheet actually shrank (or the
+    # old length is unknown) is there anything to clear
+    ranges = [f"'{name}'!A{len(df) + 2}:ZZ" for name, df in pairs
+              if prev_rows.get(name) is None or len(df) < prev_rows[name]]
+    if ranges:
+        spreadsheet.values_batch_clear(body={"ranges": ranges})
+    # Invalidate only the saved sheets; the others stay cache-hits
+    for name, _ in pairs:
+        load_data.clear(name)
+    load_all_sheets.clear()
+
+def save_data(worksheet, df, orig=None):
+    sheet_name = worksheet.title
+    # Callers pass the pre-edit frame the editor was fed, so the diff costs
+    # no round-trip; without it we deliberately fetch the live sheet once.
+    # Same-shape edits go out as changed cells only.
+    if orig is None:
+        orig = load_data(sheet_name)
+    if df.equals(orig):
+        return
+    if orig.shape == df.shape and list(orig.columns) == list(df.columns):
+        # Compare (and send) the sheet's string form, so NaN/None both read
+        # and write as the empty cell they represent
+        orig_cells = _as_cell_strings(orig)
+        df_cells = _as_cell_strings(df)
+        changed = orig_cells.ne(df_cells).to_numpy()
+        if not changed.any():
+            return
+        if changed.sum() <= changed.size * 0.3:
+            rows, cols = changed.nonzero()
+            # +2/+1: sheet rows are 1-based with a header row, cols are 1-based
+            data = [{"range": gspread.utils.rowcol_to_a1(r + 2, c + 1), "values": [[df_cells.iat[r, c]]]}
+                    for r, c in zip(rows, cols)]
+            worksheet.batch_update(data, value_input_option="USER_ENTERED")
+            load_data.clear(sheet_name)
+            load_all_sheets.clear()
+            return
+    save_all(worksheet.spreadsheet, [(sheet_name, df)], prev_rows={sheet_name: len(orig)})
+
+def format_number_cell(value):
+    """Renders an edited numeric cell back to the sheet's plain-string form."""
+    if pd.isna(value):
+        return ""
+    as_float = float(value)
+    if as_float.is_integer():
+        return str(int(as_float))
+    # float32 값을 float()로 넓히면 잡음이 붙음(4.3 → 4.30000019…) —
+    # 원 타입의 최단 표현을 그대로 써서 저장 문자열을 깨끗하게 유지
+    return str(value) if isinstance(value, np.floating) else str(as_float)